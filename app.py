@@ -1,57 +1,194 @@
 from flask import Flask, render_template, request, jsonify, session
+from flask.json.provider import DefaultJSONProvider
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_caching import Cache
+from flask_session import Session
+import orjson
+import redis
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bisect import bisect_right
+import hashlib
+import logging
 import os
-from datetime import datetime
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from datetime import date
 from functools import wraps
+from itertools import islice
+from operator import itemgetter
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Serve jsonify responses through orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        # Callers such as the session serializer pass hooks orjson can't honour
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+logger = logging.getLogger(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 
-# Configure caching
-cache = Cache(app, config={
-    'CACHE_TYPE': 'simple',
-    'CACHE_DEFAULT_TIMEOUT': 600  # 10 minutes
-})
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Configure caching (Redis is shared across workers; fall back to in-process)
+if REDIS_URL:
+    cache = Cache(app, config={
+        'CACHE_TYPE': 'RedisCache',
+        'CACHE_REDIS_URL': REDIS_URL,
+        'CACHE_KEY_PREFIX': 'wx:',
+        'CACHE_DEFAULT_TIMEOUT': 600  # 10 minutes
+    })
+else:
+    cache = Cache(app, config={
+        'CACHE_TYPE': 'SimpleCache',
+        'CACHE_DEFAULT_TIMEOUT': 600  # 10 minutes
+    })
 
-# Configure rate limiting
+# Keep sessions server-side in Redis so the cookie only carries a session id
+if REDIS_URL:
+    app.config.update(
+        SESSION_TYPE='redis',
+        SESSION_REDIS=redis.from_url(REDIS_URL),
+        SESSION_KEY_PREFIX='wx:session:',
+        # Only write the session (and Set-Cookie) when it changes, so
+        # publicly cacheable responses never carry a session id
+        SESSION_REFRESH_EACH_REQUEST=False
+    )
+    Session(app)
+
+# City -> coordinates barely ever changes
+GEOCODE_CACHE_TIMEOUT = 30 * 24 * 60 * 60  # 30 days
+
+# Configure rate limiting (Redis enforces limits across all workers)
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    storage_uri=REDIS_URL or "memory://",
+    strategy="moving-window"
 )
 
 # OpenMeteo API configuration
 BASE_URL = 'https://api.open-meteo.com/v1'
 GEOCODING_URL = 'https://geocoding-api.open-meteo.com/v1/search'
 
-def get_coordinates(city):
-    """Get coordinates for a city using OpenMeteo Geocoding API"""
+# Shared HTTP session so OpenMeteo connections are kept alive and reused
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(
+    pool_connections=50,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+))
+
+# Worker pool for upstream calls that can run concurrently; sized to match
+# gunicorn's worker_connections so every in-flight request can get a slot
+# (under gevent these threads are greenlets, so a large pool is cheap)
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('UPSTREAM_WORKERS', 1000)))
+
+# Longest a weather response will wait on air quality before reporting N/A
+AIR_QUALITY_TIMEOUT = 5  # seconds
+
+# Process-local LRU of geocoding results, keyed by normalized city name
+GEOCODE_LRU_SIZE = 4096
+geocode_lru = OrderedDict()
+geocode_lru_lock = threading.Lock()
+
+# Weather fetches currently in progress, keyed by cache key
+inflight = {}
+inflight_lock = threading.Lock()
+
+def cache_get(key):
+    """Read from the cache, treating backend errors as a miss"""
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.exception("Exception possibly due to cache backend.")
+        return None
+
+def cache_set(key, value, timeout=None):
+    """Write to the cache, logging rather than raising on backend errors"""
     try:
+        cache.set(key, value, timeout=timeout)
+    except Exception:
+        logger.exception("Exception possibly due to cache backend.")
+
+def normalize_city(city):
+    """Normalize a city name for use in cache keys (case, accents, whitespace)"""
+    decomposed = unicodedata.normalize('NFKD', city)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+def lookup_coordinates(city):
+    """Resolve a city name to (latitude, longitude, name, country, admin1)"""
+    # Cache under the normalized name, but query with the name as typed since
+    # normalizing can mangle non-Latin scripts
+    city_norm = normalize_city(city)
+    with geocode_lru_lock:
+        location = geocode_lru.get(city_norm)
+        if location is not None:
+            geocode_lru.move_to_end(city_norm)
+            return location
+    
+    cache_key = f"geo:{city_norm}"
+    location = cache_get(cache_key)
+    if location is None:
         params = {
             'name': city,
-            'count': 5,  # Get top 5 results for autocomplete
+            'count': 1,  # Only the best match is used
             'language': 'en',
             'format': 'json'
         }
         
-        response = requests.get(GEOCODING_URL, params=params, timeout=10)
+        response = http_session.get(GEOCODING_URL, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
+        # "Not found" is not cached, so an odd upstream response can't pin it
         if not data.get('results'):
             return None
-            
-        location = data['results'][0]
+        
+        result = data['results'][0]
+        location = (
+            result['latitude'],
+            result['longitude'],
+            result['name'],
+            result.get('country', ''),
+            result.get('admin1', '')
+        )
+        cache_set(cache_key, location, timeout=GEOCODE_CACHE_TIMEOUT)
+    
+    with geocode_lru_lock:
+        geocode_lru[city_norm] = location
+        geocode_lru.move_to_end(city_norm)
+        if len(geocode_lru) > GEOCODE_LRU_SIZE:
+            geocode_lru.popitem(last=False)
+    return location
+
+def get_coordinates(city):
+    """Get coordinates for a city using OpenMeteo Geocoding API"""
+    try:
+        location = lookup_coordinates(city.strip())
+        if location is None:
+            return None
+        
+        latitude, longitude, name, country, admin1 = location
         return {
-            'latitude': location['latitude'],
-            'longitude': location['longitude'],
-            'name': location['name'],
-            'country': location.get('country', ''),
-            'admin1': location.get('admin1', '')
+            'latitude': latitude,
+            'longitude': longitude,
+            'name': name,
+            'country': country,
+            'admin1': admin1
         }
         
     except requests.exceptions.Timeout:
@@ -59,73 +196,119 @@ def get_coordinates(city):
     except requests.exceptions.ConnectionError:
         return {'error': 'Network connection error. Please check your internet.'}
     except Exception as e:
-        print(f"Geocoding error: {e}")
+        logger.warning("Geocoding error: %s", e)
         return None
 
+# Weather code lookup tables, built once at import
+WEATHER_CODES = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    56: "Light freezing drizzle", 57: "Dense freezing drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+    66: "Light freezing rain", 67: "Heavy freezing rain",
+    71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
+    77: "Snow grains",
+    80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
+    85: "Slight snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
+}
+
+DAY_ICONS = {
+    0: "☀️", 1: "🌤️", 2: "⛅", 3: "☁️",
+    45: "🌫️", 48: "🌫️",
+    51: "🌦️", 53: "🌦️", 55: "🌦️",
+    56: "🌨️", 57: "🌨️",
+    61: "🌧️", 63: "🌧️", 65: "⛈️",
+    66: "🌨️", 67: "🌨️",
+    71: "❄️", 73: "❄️", 75: "❄️", 77: "❄️",
+    80: "🌦️", 81: "🌧️", 82: "⛈️",
+    85: "🌨️", 86: "🌨️",
+    95: "⛈️", 96: "⛈️", 99: "⛈️"
+}
+
+NIGHT_ICONS = {
+    0: "🌙", 1: "🌙", 2: "☁️", 3: "☁️",
+    45: "🌫️", 48: "🌫️",
+    51: "🌦️", 53: "🌦️", 55: "🌦️",
+    56: "🌨️", 57: "🌨️",
+    61: "🌧️", 63: "🌧️", 65: "⛈️",
+    66: "🌨️", 67: "🌨️",
+    71: "❄️", 73: "❄️", 75: "❄️", 77: "❄️",
+    80: "🌦️", 81: "🌧️", 82: "⛈️",
+    85: "🌨️", 86: "🌨️",
+    95: "⛈️", 96: "⛈️", 99: "⛈️"
+}
+
+UNKNOWN_ICON = "❓"
+
+# Codes are always in [0, 99], so index flat tuples instead of hashing
+WEATHER_CODE_RANGE = range(100)
+DESCRIPTION_TABLE = tuple(WEATHER_CODES.get(i, "Unknown") for i in WEATHER_CODE_RANGE)
+DAY_ICON_TABLE = tuple(DAY_ICONS.get(i, UNKNOWN_ICON) for i in WEATHER_CODE_RANGE)
+NIGHT_ICON_TABLE = tuple(NIGHT_ICONS.get(i, UNKNOWN_ICON) for i in WEATHER_CODE_RANGE)
+
 def get_weather_code_description(code):
     """Convert weather code to description"""
-    weather_codes = {
-        0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-        45: "Fog", 48: "Depositing rime fog",
-        51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-        56: "Light freezing drizzle", 57: "Dense freezing drizzle",
-        61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-        66: "Light freezing rain", 67: "Heavy freezing rain",
-        71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-        77: "Snow grains",
-        80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
-        85: "Slight snow showers", 86: "Heavy snow showers",
-        95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-    }
-    return weather_codes.get(code, "Unknown")
+    # Range membership also accepts integral floats such as 3.0
+    return DESCRIPTION_TABLE[int(code)] if code in WEATHER_CODE_RANGE else "Unknown"
 
 def get_weather_icon(code, is_day=True):
     """Get weather icon based on weather code"""
-    day_icons = {
-        0: "☀️", 1: "🌤️", 2: "⛅", 3: "☁️",
-        45: "🌫️", 48: "🌫️",
-        51: "🌦️", 53: "🌦️", 55: "🌦️",
-        56: "🌨️", 57: "🌨️",
-        61: "🌧️", 63: "🌧️", 65: "⛈️",
-        66: "🌨️", 67: "🌨️",
-        71: "❄️", 73: "❄️", 75: "❄️", 77: "❄️",
-        80: "🌦️", 81: "🌧️", 82: "⛈️",
-        85: "🌨️", 86: "🌨️",
-        95: "⛈️", 96: "⛈️", 99: "⛈️"
-    }
-    
-    night_icons = {
-        0: "🌙", 1: "🌙", 2: "☁️", 3: "☁️",
-        45: "🌫️", 48: "🌫️",
-        51: "🌦️", 53: "🌦️", 55: "🌦️",
-        56: "🌨️", 57: "🌨️",
-        61: "🌧️", 63: "🌧️", 65: "⛈️",
-        66: "🌨️", 67: "🌨️",
-        71: "❄️", 73: "❄️", 75: "❄️", 77: "❄️",
-        80: "🌦️", 81: "🌧️", 82: "⛈️",
-        85: "🌨️", 86: "🌨️",
-        95: "⛈️", 96: "⛈️", 99: "⛈️"
-    }
-    
-    icons = day_icons if is_day else night_icons
-    return icons.get(code, "❓")
+    if code not in WEATHER_CODE_RANGE:
+        return UNKNOWN_ICON
+    return (DAY_ICON_TABLE if is_day else NIGHT_ICON_TABLE)[int(code)]
+
+# OpenMeteo dates are always YYYY-MM-DD, so format them without strftime
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+MONTH_NAMES = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+def format_forecast_date(date_str):
+    """Format an ISO date as e.g. 'Friday, October 16'"""
+    day = date.fromisoformat(date_str)
+    return f"{WEEKDAY_NAMES[day.weekday()]}, {MONTH_NAMES[day.month - 1]} {day.day:02d}"
+
+# Required fields of the 'current' block, fetched in one call
+CURRENT_FIELDS = itemgetter(
+    'temperature_2m', 'apparent_temperature', 'weather_code', 'is_day',
+    'relative_humidity_2m', 'surface_pressure', 'wind_speed_10m', 'wind_direction_10m'
+)
+
+# UV risk levels and the index values at which each next level starts
+UV_LEVELS = ("Low", "Moderate", "High", "Very High", "Extreme")
+UV_CUTOFFS = (3, 6, 8, 11)
 
 def get_uv_index_level(uv):
     """Get UV index risk level"""
-    if uv < 3:
-        return "Low"
-    elif uv < 6:
-        return "Moderate"
-    elif uv < 8:
-        return "High"
-    elif uv < 11:
-        return "Very High"
-    else:
-        return "Extreme"
-
-@cache.memoize(timeout=600)
-def get_weather_data(city, unit='celsius'):
-    """Fetch weather data with caching"""
+    return UV_LEVELS[bisect_right(UV_CUTOFFS, uv)]
+
+NO_AIR_QUALITY = {'aqi': 'N/A', 'pm10': 'N/A', 'pm25': 'N/A'}
+
+def get_air_quality(latitude, longitude):
+    """Fetch current air quality, falling back to N/A values on any failure"""
+    air_quality_url = f"{BASE_URL}/air-quality"
+    aq_params = {
+        'latitude': latitude,
+        'longitude': longitude,
+        'current': ['us_aqi', 'pm10', 'pm2_5']
+    }
+    
+    try:
+        aq_response = http_session.get(air_quality_url, params=aq_params, timeout=AIR_QUALITY_TIMEOUT)
+        aq_data = orjson.loads(aq_response.content)
+        return {
+            'aqi': aq_data['current'].get('us_aqi', 'N/A'),
+            'pm10': aq_data['current'].get('pm10', 'N/A'),
+            'pm25': aq_data['current'].get('pm2_5', 'N/A')
+        }
+    except:
+        return dict(NO_AIR_QUALITY)
+
+def fetch_weather_data(city, unit='celsius'):
+    """Fetch weather data from OpenMeteo"""
     try:
         location = get_coordinates(city)
         if not location:
@@ -164,88 +347,94 @@ def get_weather_data(city, unit='celsius'):
             'forecast_days': 7
         }
         
-        response = requests.get(weather_url, params=params, timeout=10)
+        # Fetch air quality in the background while the forecast request runs
+        aq_future = executor.submit(get_air_quality, location['latitude'], location['longitude'])
+        
+        response = http_session.get(weather_url, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         current = data['current']
         daily = data['daily']
         hourly = data['hourly']
         
-        # Get air quality data
-        air_quality_url = f"{BASE_URL}/air-quality"
-        aq_params = {
-            'latitude': location['latitude'],
-            'longitude': location['longitude'],
-            'current': ['us_aqi', 'pm10', 'pm2_5']
-        }
-        
         try:
-            aq_response = requests.get(air_quality_url, params=aq_params, timeout=5)
-            aq_data = aq_response.json()
-            air_quality = {
-                'aqi': aq_data['current'].get('us_aqi', 'N/A'),
-                'pm10': aq_data['current'].get('pm10', 'N/A'),
-                'pm25': aq_data['current'].get('pm2_5', 'N/A')
-            }
-        except:
-            air_quality = {'aqi': 'N/A', 'pm10': 'N/A', 'pm25': 'N/A'}
+            air_quality = aq_future.result(timeout=AIR_QUALITY_TIMEOUT)
+        except FuturesTimeoutError:
+            aq_future.cancel()
+            air_quality = dict(NO_AIR_QUALITY)
         
         # Process current weather
+        (temperature, feels_like, weather_code, is_day, humidity,
+         pressure, wind_speed, wind_direction) = CURRENT_FIELDS(current)
+        visibility = current.get('visibility')
+        uv_index = current.get('uv_index')
+        sunrise = daily.get('sunrise')
+        sunset = daily.get('sunset')
         current_weather = {
             'city': location['name'],
             'country': location['country'],
             'admin1': location.get('admin1', ''),
-            'temperature': round(current['temperature_2m']),
-            'feels_like': round(current['apparent_temperature']),
-            'description': get_weather_code_description(current['weather_code']),
-            'icon': get_weather_icon(current['weather_code'], current['is_day']),
-            'humidity': current['relative_humidity_2m'],
-            'pressure': round(current['surface_pressure']),
-            'wind_speed': round(current['wind_speed_10m'], 1),
-            'wind_direction': round(current['wind_direction_10m']),
+            'temperature': round(temperature),
+            'feels_like': round(feels_like),
+            'description': get_weather_code_description(weather_code),
+            'icon': get_weather_icon(weather_code, is_day),
+            'humidity': humidity,
+            'pressure': round(pressure),
+            'wind_speed': round(wind_speed, 1),
+            'wind_direction': round(wind_direction),
             'precipitation': current.get('precipitation', 0),
             'cloud_cover': current.get('cloud_cover', 'N/A'),
-            'visibility': round(current.get('visibility', 0) / 1000, 1) if current.get('visibility') else 'N/A',
-            'uv_index': current.get('uv_index', 'N/A'),
-            'uv_level': get_uv_index_level(current.get('uv_index', 0)) if current.get('uv_index') else 'N/A',
-            'sunrise': daily['sunrise'][0].split('T')[1][:5] if daily.get('sunrise') else 'N/A',
-            'sunset': daily['sunset'][0].split('T')[1][:5] if daily.get('sunset') else 'N/A',
+            'visibility': round(visibility / 1000, 1) if visibility else 'N/A',
+            'uv_index': uv_index if uv_index is not None else 'N/A',
+            'uv_level': get_uv_index_level(uv_index) if uv_index is not None else 'N/A',
+            'sunrise': sunrise[0][11:16] if sunrise else 'N/A',
+            'sunset': sunset[0][11:16] if sunset else 'N/A',
             'air_quality': air_quality,
             'unit': unit
         }
         
-        # Process 24-hour hourly forecast
-        hourly_forecasts = []
-        current_hour = datetime.now().hour
-        for i in range(24):
-            hour_data = {
-                'time': hourly['time'][i].split('T')[1][:5],
-                'temperature': round(hourly['temperature_2m'][i]),
-                'icon': get_weather_icon(hourly['weather_code'][i], True),
-                'precipitation_prob': hourly['precipitation_probability'][i],
-                'precipitation': hourly['precipitation'][i],
-                'wind_speed': round(hourly['wind_speed_10m'][i], 1)
+        # Process 24-hour hourly forecast, walking the columns in lockstep
+        hourly_columns = zip(
+            hourly['time'], hourly['temperature_2m'], hourly['weather_code'],
+            hourly['precipitation_probability'], hourly['precipitation'],
+            hourly['wind_speed_10m']
+        )
+        hourly_forecasts = [
+            {
+                'time': time[11:16],
+                'temperature': round(temperature),
+                'icon': get_weather_icon(code, True),
+                'precipitation_prob': precipitation_prob,
+                'precipitation': precipitation,
+                'wind_speed': round(wind_speed, 1)
             }
-            hourly_forecasts.append(hour_data)
+            for time, temperature, code, precipitation_prob, precipitation, wind_speed
+            in islice(hourly_columns, 24)
+        ]
         
-        # Process 5-day forecast
-        daily_forecasts = []
-        for i in range(1, min(6, len(daily['time']))):
-            date_str = daily['time'][i]
-            date_obj = datetime.fromisoformat(date_str)
-            
-            daily_forecasts.append({
-                'date': date_obj.strftime('%A, %B %d'),
-                'temperature_max': round(daily['temperature_2m_max'][i]),
-                'temperature_min': round(daily['temperature_2m_min'][i]),
-                'description': get_weather_code_description(daily['weather_code'][i]),
-                'icon': get_weather_icon(daily['weather_code'][i], True),
-                'precipitation': daily['precipitation_sum'][i],
-                'precipitation_prob': daily['precipitation_probability_max'][i],
-                'wind_speed': round(daily['wind_speed_10m_max'][i], 1),
-                'uv_index': daily['uv_index_max'][i]
-            })
+        # Process 5-day forecast (skipping today)
+        daily_columns = zip(
+            daily['time'], daily['temperature_2m_max'], daily['temperature_2m_min'],
+            daily['weather_code'], daily['precipitation_sum'],
+            daily['precipitation_probability_max'], daily['wind_speed_10m_max'],
+            daily['uv_index_max']
+        )
+        daily_forecasts = [
+            {
+                'date': format_forecast_date(date_str),
+                'temperature_max': round(temperature_max),
+                'temperature_min': round(temperature_min),
+                'description': get_weather_code_description(code),
+                'icon': get_weather_icon(code, True),
+                'precipitation': precipitation,
+                'precipitation_prob': precipitation_prob,
+                'wind_speed': round(wind_speed, 1),
+                'uv_index': uv_index
+            }
+            for (date_str, temperature_max, temperature_min, code, precipitation,
+                 precipitation_prob, wind_speed, uv_index) in islice(daily_columns, 1, 6)
+        ]
         
         return {
             'success': True,
@@ -263,6 +452,50 @@ def get_weather_data(city, unit='celsius'):
     except Exception as e:
         return {'success': False, 'error': f'An error occurred: {str(e)}'}
 
+def get_weather_data(city, unit='celsius'):
+    """Fetch weather data with caching"""
+    unit = 'celsius' if unit == 'celsius' else 'fahrenheit'
+    cache_key = f"weather:{normalize_city(city)}:{unit}"
+    
+    weather_data = cache_get(cache_key)
+    if weather_data is not None:
+        return weather_data
+    
+    # Single-flight: the first request for a key fetches, concurrent ones wait on it
+    with inflight_lock:
+        pending = inflight.get(cache_key)
+        if pending is None:
+            pending = inflight[cache_key] = Future()
+            is_leader = True
+        else:
+            is_leader = False
+    
+    if not is_leader:
+        try:
+            return pending.result(timeout=10)
+        except FuturesTimeoutError:
+            return fetch_weather_data(city, unit)
+    
+    try:
+        # A previous leader may have filled the cache since our first check
+        weather_data = cache_get(cache_key)
+        if weather_data is not None:
+            pending.set_result(weather_data)
+            return weather_data
+        
+        weather_data = fetch_weather_data(city, unit)
+        # Only successful lookups are cached so transient errors are retried
+        if weather_data['success']:
+            cache_set(cache_key, weather_data)
+        pending.set_result(weather_data)
+        return weather_data
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with inflight_lock:
+            del inflight[cache_key]
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -277,18 +510,29 @@ def get_weather():
     if not city:
         return jsonify({'success': False, 'error': 'City name is required'})
     
-    # Store in recent searches
-    if 'recent_searches' not in session:
-        session['recent_searches'] = []
-    
-    if city not in session['recent_searches']:
-        session['recent_searches'].insert(0, city)
-        session['recent_searches'] = session['recent_searches'][:5]
-        session.modified = True
+    # Store in recent searches, only touching the session when the list changes
+    recent = session.get('recent_searches', [])
+    if not recent or recent[0] != city:
+        session['recent_searches'] = [city] + [c for c in recent if c != city][:4]
     
     weather_data = get_weather_data(city, unit)
     return jsonify(weather_data)
 
+@app.route('/weather/<city>/<unit>', methods=['GET'])
+@limiter.limit("30 per minute")
+def get_weather_cacheable(city, unit):
+    """Cacheable GET variant of /weather for browsers and CDNs"""
+    city = city.strip()
+    if not city:
+        return jsonify({'success': False, 'error': 'City name is required'})
+    
+    weather_data = get_weather_data(city, unit)
+    response = jsonify(weather_data)
+    if weather_data['success']:
+        response.headers['Cache-Control'] = 'public, max-age=600'
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+    return response.make_conditional(request)
+
 @app.route('/geocode', methods=['POST'])
 @limiter.limit("60 per minute")
 def geocode():
@@ -307,9 +551,9 @@ def geocode():
             'format': 'json'
         }
         
-        response = requests.get(GEOCODING_URL, params=params, timeout=5)
+        response = http_session.get(GEOCODING_URL, params=params, timeout=5)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         results = []
         if data.get('results'):
@@ -356,8 +600,8 @@ def get_weather_by_coords():
             'format': 'json'
         }
         
-        response = requests.get(GEOCODING_URL, params=params, timeout=10)
-        data = response.json()
+        response = http_session.get(GEOCODING_URL, params=params, timeout=10)
+        data = orjson.loads(response.content)
         
         if data.get('results'):
             city = data['results'][0]['name']
@@ -0,0 +1,11 @@
+import multiprocessing
+import os
+
+# The app spends nearly all its time waiting on OpenMeteo, so use cooperative
+# gevent workers (the worker monkey-patches sockets before loading the app)
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = 'gevent'
+workers = multiprocessing.cpu_count()
+worker_connections = 1000
+timeout = 30
+keepalive = 5